@@ -17,6 +17,10 @@ class TelegramConfig(BaseModel):
     bot_token: Optional[str] = None
     chat_id: Optional[str] = None
     report_interval_hours: int = 1
+    webhook_url: Optional[str] = None  # None = long polling
+    webhook_port: int = 8443
+    webhook_secret: Optional[str] = None
+    trade_digest_window: float = 0.5  # seconds; 0 = one message per trade
 
 class SizingConfig(BaseModel):
     mode: str = "proportional"  # "fixed" or "proportional"
@@ -128,6 +132,12 @@ class Settings(BaseModel):
         
         settings.telegram.bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
         settings.telegram.chat_id = os.getenv('TELEGRAM_CHAT_ID')
+        settings.telegram.webhook_url = os.getenv('TELEGRAM_WEBHOOK_URL') or None
+        settings.telegram.webhook_port = int(os.getenv('TELEGRAM_WEBHOOK_PORT', settings.telegram.webhook_port))
+        settings.telegram.webhook_secret = os.getenv('TELEGRAM_WEBHOOK_SECRET') or None
+        
+        digest_window = float(os.getenv('TELEGRAM_TRADE_DIGEST_WINDOW', settings.telegram.trade_digest_window))
+        settings.telegram.trade_digest_window = min(max(digest_window, 0.0), 10.0)
         
         settings.log_level = os.getenv('LOG_LEVEL', settings.log_level)
         settings.log_file = os.getenv('LOG_FILE', settings.log_file)
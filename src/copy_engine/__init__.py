@@ -1,5 +1,5 @@
 from .monitor import WalletMonitor
-from .executor import TradeExecutor
+from .executor import TradeExecutor, OrderSpec
 from .position_sizer import PositionSizer
 
-__all__ = ['WalletMonitor', 'TradeExecutor', 'PositionSizer']
+__all__ = ['WalletMonitor', 'TradeExecutor', 'OrderSpec', 'PositionSizer']
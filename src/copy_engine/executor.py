@@ -1,14 +1,128 @@
-"""Trade execution engine for Hyperliquid"""
+"""Trade execution engine for Hyperliquid
+
+The executor can share an application-wide aiohttp session so its
+requests reuse connections already opened by other components:
+
+    async with aiohttp.ClientSession() as session:
+        executor = TradeExecutor(wallet_address, private_key, session=session)
+        await executor.execute_market_order("BTC", OrderSide.BUY, Decimal("0.01"))
+        await executor.aclose()  # leaves the shared session open
+"""
+import asyncio
+import functools
+import itertools
+import random
 import time
-from typing import Optional, Dict, Any
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple
 from decimal import Decimal
 from eth_account import Account
+from eth_account.messages import encode_typed_data
 import aiohttp
+import orjson
 
 from ..utils.logger import logger
 from ..hyperliquid.models import OrderType, OrderSide
 
 
+# EIP-712 payload for agent signatures, constant for every action
+_ZERO_ADDRESS = "0x" + "0" * 40
+_ZERO_BYTES32 = "0x" + "0" * 64
+_EIP712_DOMAIN = {
+    "name": "Exchange",
+    "version": "1",
+    "chainId": 1337,
+    "verifyingContract": _ZERO_ADDRESS
+}
+_EIP712_AGENT_TYPES = {
+    "Agent": [
+        {"name": "source", "type": "string"},
+        {"name": "connectionId", "type": "bytes32"}
+    ]
+}
+_EIP712_MESSAGE = {
+    "source": "a",  # "a" indicates API order
+    "connectionId": _ZERO_BYTES32
+}
+
+# Prefix for simulated order IDs
+_SIM_PREFIX = "sim_"
+
+# Order type fields shared by every order payload (never mutated)
+_MARKET_ORDER_T = {"limit": {"tif": "Ioc"}}
+_LIMIT_ORDER_TIF = {
+    "Gtc": {"limit": {"tif": "Gtc"}},
+    "Alo": {"limit": {"tif": "Alo"}},
+    "Ioc": _MARKET_ORDER_T
+}
+
+
+# Retry policy for transient exchange errors (5xx, 429, network failures)
+_MAX_ATTEMPTS = 3
+_RETRY_BASE_DELAY = 0.05
+
+
+def _is_retryable(status: int) -> bool:
+    """Check if an HTTP status is worth retrying"""
+    return status == 429 or status >= 500
+
+
+def _json_dumps(obj: Any) -> str:
+    """Serialize request bodies with orjson"""
+    return orjson.dumps(obj).decode()
+
+
+def _format_decimal(value: Decimal) -> str:
+    """Format a size or price for an order payload without float rounding
+    
+    Args:
+        value: Value to format (floats are converted via their repr)
+        
+    Returns:
+        Plain decimal string without exponent or trailing zeros
+    """
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return format(value.normalize(), "f")
+
+
+@functools.lru_cache(maxsize=16)
+def _account_from_key(private_key: str):
+    """Derive a signing account, cached so rebuilt executors skip key derivation
+    
+    The cache keeps the key material in memory for the process lifetime,
+    so it is only used when an executor opts in with share_account_cache.
+    """
+    return Account.from_key(private_key)
+
+
+@dataclass
+class OrderSpec:
+    """Single order within a batch submission"""
+    symbol: str
+    side: OrderSide
+    size: Decimal
+    price: Optional[Decimal] = None  # None = market order
+    reduce_only: bool = False
+    tif: str = "Gtc"  # Gtc, Alo or Ioc; ignored for market orders
+    
+    def __post_init__(self):
+        if self.tif not in _LIMIT_ORDER_TIF:
+            raise ValueError(f"Invalid tif {self.tif!r}; expected one of {', '.join(_LIMIT_ORDER_TIF)}")
+
+
+def _resting_oid(result: Dict[str, Any]) -> Optional[str]:
+    """Extract the resting order ID from an order response"""
+    statuses = result["response"]["data"].get("statuses") or [{}]
+    return statuses[0].get("resting", {}).get("oid")
+
+
+async def _handle_error(response: aiohttp.ClientResponse, description: str):
+    """Log a non-200 exchange response"""
+    error_text = await response.text()
+    logger.error(f"Failed to {description}: {error_text}")
+
+
 class TradeExecutor:
     """Executes trades on Hyperliquid exchange"""
     
@@ -18,7 +132,12 @@ class TradeExecutor:
         private_key: str,
         info_url: str = "https://api.hyperliquid.xyz/info",
         exchange_url: str = "https://api.hyperliquid.xyz/exchange",
-        dry_run: bool = True
+        dry_run: bool = True,
+        pool_limit: int = 256,
+        per_host_limit: int = 64,
+        session: Optional[aiohttp.ClientSession] = None,
+        parallel_leverage: bool = False,
+        share_account_cache: bool = False
     ):
         """Initialize trade executor
         
@@ -28,6 +147,13 @@ class TradeExecutor:
             info_url: Hyperliquid info API URL
             exchange_url: Hyperliquid exchange API URL
             dry_run: If True, simulate orders without executing
+            pool_limit: Maximum number of concurrent HTTP connections
+            per_host_limit: Maximum number of concurrent connections per host
+            session: Externally owned HTTP session to reuse (not closed by aclose)
+            parallel_leverage: If True, send a leverage change concurrently with
+                the order instead of waiting for it first
+            share_account_cache: If True, reuse signing accounts derived by
+                earlier executors for the same key (keeps the key cached)
         """
         self.wallet_address = wallet_address.lower() if wallet_address else None
         self.private_key = private_key
@@ -35,17 +161,40 @@ class TradeExecutor:
         self.exchange_url = exchange_url
         self.dry_run = dry_run
         
+        # Last leverage set per symbol: symbol -> (leverage, is_cross)
+        self._leverage_cache: Dict[str, Tuple[int, bool]] = {}
+        self.parallel_leverage = parallel_leverage
+        self._last_nonce = 0
+        
+        # Sequence for dry-run order IDs (unique even within the same second)
+        self._sim_counter = itertools.count(1)
+        
+        # Shared HTTP session, created lazily on first request unless provided
+        self._session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
+        self.pool_limit = pool_limit
+        self.per_host_limit = per_host_limit
+        if self._owns_session:
+            logger.info(
+                f"HTTP connection pool: limit={pool_limit} per_host={per_host_limit}"
+            )
+        
         # Initialize signing account if we have credentials
         self.account = None
+        self._cached_signature: Optional[Dict[str, Any]] = None
         if self.private_key and not self.dry_run:
             try:
-                self.account = Account.from_key(self.private_key)
+                if share_account_cache:
+                    self.account = _account_from_key(self.private_key)
+                else:
+                    self.account = Account.from_key(self.private_key)
                 # Validate address matches
                 if self.account.address.lower() != self.wallet_address:
                     raise ValueError(
                         f"Private key address {self.account.address} doesn't match "
                         f"configured address {self.wallet_address}"
                     )
+                self._cached_signature = self._sign_agent()
                 logger.info(f"✅ Executor initialized for wallet {self.wallet_address}")
             except Exception as e:
                 logger.error(f"Failed to initialize signing account: {e}")
@@ -55,6 +204,67 @@ class TradeExecutor:
         else:
             logger.warning("⚠️ Running in DRY RUN mode - no real trades will be executed")
     
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use
+        
+        Reusing one session keeps connections to the exchange alive
+        between requests instead of paying a new TCP+TLS handshake per call.
+        
+        Returns:
+            Open aiohttp client session
+        """
+        if not self._owns_session:
+            return self._session
+        
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10),
+                headers={"Content-Type": "application/json"},
+                json_serialize=_json_dumps,
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_limit,
+                    limit_per_host=self.per_host_limit,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=60,
+                    enable_cleanup_closed=True
+                )
+            )
+        return self._session
+    
+    async def aclose(self):
+        """Close the HTTP session if this executor created it"""
+        if not self._owns_session:
+            return
+        
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def __aenter__(self) -> "TradeExecutor":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    def _sign_agent(self) -> Dict[str, Any]:
+        """Sign the EIP-712 agent message
+        
+        The agent signature binds only the constant domain and message, not
+        the action, so it is computed once and reused for every request.
+        Any change to _EIP712_MESSAGE must recompute it.
+        
+        Returns:
+            Signature object with r, s and v fields
+        """
+        signable = encode_typed_data(_EIP712_DOMAIN, _EIP712_AGENT_TYPES, _EIP712_MESSAGE)
+        signed_message = self.account.sign_message(signable)
+        
+        return {
+            "r": f"0x{signed_message.r:064x}",
+            "s": f"0x{signed_message.s:064x}",
+            "v": signed_message.v
+        }
+    
     def _sign_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
         """Sign an action using EIP-712 structured data signing
         
@@ -67,58 +277,84 @@ class TradeExecutor:
         if not self.account:
             raise ValueError("Cannot sign actions without account")
         
-        # Add timestamp nonce
-        timestamp = int(time.time() * 1000)
-        
-        # Create EIP-712 structured data
-        structured_data = {
-            "domain": {
-                "name": "Exchange",
-                "version": "1",
-                "chainId": 1337,
-                "verifyingContract": "0x0000000000000000000000000000000000000000"
-            },
-            "primaryType": "Agent",
-            "types": {
-                "Agent": [
-                    {"name": "source", "type": "string"},
-                    {"name": "connectionId", "type": "bytes32"}
-                ],
-                "EIP712Domain": [
-                    {"name": "name", "type": "string"},
-                    {"name": "version", "type": "string"},
-                    {"name": "chainId", "type": "uint256"},
-                    {"name": "verifyingContract", "type": "address"}
-                ]
-            },
-            "message": {
-                "source": "a",  # "a" indicates API order
-                "connectionId": "0x" + "0" * 64
-            }
-        }
-        
-        # Sign using sign_typed_data method
-        signed_message = self.account.sign_typed_data(
-            structured_data["domain"],
-            {"Agent": structured_data["types"]["Agent"]},
-            structured_data["message"]
-        )
-        
-        # Create signature object
-        signature = {
-            "r": "0x" + signed_message.r.to_bytes(32, "big").hex(),
-            "s": "0x" + signed_message.s.to_bytes(32, "big").hex(),
-            "v": signed_message.v
-        }
+        # Add timestamp nonce, kept strictly increasing for back-to-back actions
+        timestamp = max(time.time_ns() // 1_000_000, self._last_nonce + 1)
+        self._last_nonce = timestamp
         
-        # Build final request
+        # Agent signature is action-independent, so the cached one is reused
         return {
             "action": action,
             "nonce": timestamp,
-            "signature": signature,
+            "signature": self._cached_signature,
             "vaultAddress": None
         }
     
+    async def _post_signed(
+        self,
+        action: Dict[str, Any],
+        description: str,
+        parse_json: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Sign an action and post it to the exchange endpoint
+        
+        Args:
+            action: Action to sign and submit
+            description: What the action does, used in error logs
+            parse_json: If False, don't decode the response body
+            
+        Returns:
+            Parsed response (empty dict if parse_json is False) on success,
+            None otherwise
+        """
+        try:
+            # Signed once so retries reuse the nonce and can't double-submit
+            signed_action = self._sign_action(action)
+        except Exception as e:
+            logger.error(f"Error trying to {description}: {e}")
+            return None
+        
+        session = await self._get_session()
+        for attempt in range(_MAX_ATTEMPTS):
+            last_attempt = attempt == _MAX_ATTEMPTS - 1
+            responded = False
+            try:
+                async with session.post(
+                    self.exchange_url,
+                    json=signed_action
+                ) as response:
+                    responded = True
+                    if response.status != 200:
+                        if _is_retryable(response.status) and not last_attempt:
+                            logger.warning(
+                                f"Retrying {description} after HTTP {response.status} "
+                                f"(attempt {attempt + 1}/{_MAX_ATTEMPTS})"
+                            )
+                        else:
+                            await _handle_error(response, description)
+                            return None
+                    elif not parse_json:
+                        return {}
+                    else:
+                        return await response.json(loads=orjson.loads)
+                        
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # Once a response arrived the action was accepted; resending the
+                # same nonce would only be rejected as a duplicate
+                if responded or last_attempt:
+                    logger.error(f"Error trying to {description}: {e}")
+                    return None
+                logger.warning(
+                    f"Retrying {description} after {type(e).__name__} "
+                    f"(attempt {attempt + 1}/{_MAX_ATTEMPTS})"
+                )
+            except Exception as e:
+                logger.error(f"Error trying to {description}: {e}")
+                return None
+            
+            await asyncio.sleep(_RETRY_BASE_DELAY * 2 ** attempt + random.random() * _RETRY_BASE_DELAY)
+        
+        return None
+    
     async def _update_leverage(
         self,
         symbol: str,
@@ -135,34 +371,134 @@ class TradeExecutor:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            action = {
-                "type": "updateLeverage",
-                "asset": symbol,
-                "isCross": is_cross,
-                "leverage": leverage
-            }
+        action = {
+            "type": "updateLeverage",
+            "asset": symbol,
+            "isCross": is_cross,
+            "leverage": leverage
+        }
+        
+        if await self._post_signed(action, "update leverage", parse_json=False) is None:
+            return False
+        
+        self._leverage_cache[symbol] = (leverage, is_cross)
+        logger.success("✅ Updated leverage for {} to {}x", symbol, leverage)
+        return True
+    
+    async def _post_order(
+        self,
+        action: Dict[str, Any],
+        description: str,
+        symbol: str,
+        leverage: int
+    ) -> Optional[Dict[str, Any]]:
+        """Post an order action, updating leverage first if it changed
+        
+        Args:
+            action: Order action to submit
+            description: What the order does, used in error logs
+            symbol: Trading symbol of the order
+            leverage: Leverage the order should use
             
-            signed_action = self._sign_action(action)
+        Returns:
+            Parsed response on success, None otherwise
+        """
+        if leverage <= 1 or self._leverage_cache.get(symbol) == (leverage, True):
+            return await self._post_signed(action, description)
+        
+        if self.parallel_leverage:
+            _, result = await asyncio.gather(
+                self._update_leverage(symbol, leverage),
+                self._post_signed(action, description)
+            )
+            return result
+        
+        await self._update_leverage(symbol, leverage)
+        return await self._post_signed(action, description)
+    
+    def _order_wire(self, spec: OrderSpec) -> Dict[str, Any]:
+        """Build the exchange payload for a single order
+        
+        Args:
+            spec: Order to convert
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.exchange_url,
-                    json=signed_action,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status == 200:
-                        await response.json()  # Read response
-                        logger.success(f"✅ Updated leverage for {symbol} to {leverage}x")
-                        return True
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to update leverage: {error_text}")
-                        return False
-                        
-        except Exception as e:
-            logger.error(f"Error updating leverage: {e}")
-            return False
+        Returns:
+            Order dict for an "order" action
+        """
+        if spec.price is None:
+            price, order_t = "0", _MARKET_ORDER_T  # 0 = market order, Immediate or Cancel
+        else:
+            price, order_t = _format_decimal(spec.price), _LIMIT_ORDER_TIF[spec.tif]
+        
+        return {
+            "a": self.wallet_address,
+            "b": spec.side is OrderSide.BUY,
+            "p": price,
+            "s": _format_decimal(spec.size),
+            "r": spec.reduce_only,
+            "t": order_t,
+            "c": spec.symbol
+        }
+    
+    async def execute_orders_batch(self, orders: List[OrderSpec]) -> List[Optional[str]]:
+        """Submit several orders in one signed request
+        
+        Args:
+            orders: Orders to submit
+            
+        Returns:
+            Order ID for each order (in the same order), None for failed ones
+        """
+        if not orders:
+            return []
+        
+        if self.dry_run:
+            return [
+                await self._simulate_order(
+                    symbol=o.symbol,
+                    side=o.side,
+                    size=o.size,
+                    order_type=OrderType.MARKET if o.price is None else OrderType.LIMIT,
+                    price=o.price
+                )
+                for o in orders
+            ]
+        
+        action = {
+            "type": "order",
+            "orders": [self._order_wire(o) for o in orders],
+            "grouping": "na"
+        }
+        
+        result = await self._post_signed(action, f"submit batch of {len(orders)} orders")
+        if result is None:
+            return [None] * len(orders)
+        
+        try:
+            statuses = result["response"]["data"]["statuses"]
+        except (KeyError, TypeError):
+            logger.error(f"Unexpected batch order response: {result}")
+            return [None] * len(orders)
+        
+        order_ids: List[Optional[str]] = []
+        for spec, status in zip(orders, statuses):
+            placed = None
+            if isinstance(status, dict):
+                placed = status.get("resting") or status.get("filled")
+            if placed:
+                order_ids.append(placed.get("oid"))
+            else:
+                logger.error(f"Batch order failed for {spec.symbol}: {status}")
+                order_ids.append(None)
+        
+        # Pad if the exchange returned fewer statuses than orders
+        order_ids.extend([None] * (len(orders) - len(order_ids)))
+        
+        logger.success(
+            "✅ Submitted batch: {}/{} orders accepted",
+            sum(oid is not None for oid in order_ids), len(orders)
+        )
+        return order_ids
     
     async def execute_market_order(
         self,
@@ -193,53 +529,25 @@ class TradeExecutor:
                 leverage=leverage
             )
         
-        try:
-            # Update leverage first if needed
-            if leverage > 1:
-                await self._update_leverage(symbol, leverage)
-            
-            # Create market order action (price 0 = market order)
-            action = {
-                "type": "order",
-                "orders": [{
-                    "a": self.wallet_address,
-                    "b": side == OrderSide.BUY,
-                    "p": "0",  # 0 = market order
-                    "s": str(float(size)),
-                    "r": reduce_only,
-                    "t": {"limit": {"tif": "Ioc"}},  # Immediate or Cancel
-                    "c": symbol
-                }],
-                "grouping": "na"
-            }
-            
-            signed_action = self._sign_action(action)
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.exchange_url,
-                    json=signed_action,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.success(
-                            f"✅ Market {side.value} order executed: {symbol} "
-                            f"size={size} leverage={leverage}x"
-                        )
-                        # Extract order ID from response
-                        if result.get("status") == "ok" and result.get("response", {}).get("data"):
-                            order_id = result["response"]["data"].get("statuses", [{}])[0].get("resting", {}).get("oid")
-                            return order_id
-                        return "executed"  # Order filled immediately
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to execute market order: {error_text}")
-                        return None
-                        
-        except Exception as e:
-            logger.error(f"Error executing market order: {e}")
+        # Create market order action (price 0 = market order)
+        action = {
+            "type": "order",
+            "orders": [self._order_wire(OrderSpec(symbol, side, size, reduce_only=reduce_only))],
+            "grouping": "na"
+        }
+        
+        result = await self._post_order(action, "execute market order", symbol, leverage)
+        if result is None:
             return None
+        
+        logger.success(
+            "✅ Market {} order executed: {} size={} leverage={}x",
+            side.value, symbol, size, leverage
+        )
+        # Extract order ID from response
+        if result.get("status") == "ok" and result.get("response", {}).get("data"):
+            return _resting_oid(result)
+        return "executed"  # Order filled immediately
     
     async def execute_limit_order(
         self,
@@ -275,55 +583,27 @@ class TradeExecutor:
                 leverage=leverage
             )
         
-        try:
-            # Update leverage first if needed
-            if leverage > 1:
-                await self._update_leverage(symbol, leverage)
-            
-            # Create limit order action
-            tif = "Alo" if post_only else "Gtc"  # Alo = Add Liquidity Only, Gtc = Good Till Cancel
-            
-            action = {
-                "type": "order",
-                "orders": [{
-                    "a": self.wallet_address,
-                    "b": side == OrderSide.BUY,
-                    "p": str(float(price)),
-                    "s": str(float(size)),
-                    "r": reduce_only,
-                    "t": {"limit": {"tif": tif}},
-                    "c": symbol
-                }],
-                "grouping": "na"
-            }
-            
-            signed_action = self._sign_action(action)
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.exchange_url,
-                    json=signed_action,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.success(
-                            f"✅ Limit {side.value} order placed: {symbol} "
-                            f"size={size} price={price} leverage={leverage}x"
-                        )
-                        # Extract order ID from response
-                        if result.get("status") == "ok" and result.get("response", {}).get("data"):
-                            order_id = result["response"]["data"].get("statuses", [{}])[0].get("resting", {}).get("oid")
-                            return order_id
-                        return None
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to place limit order: {error_text}")
-                        return None
-                        
-        except Exception as e:
-            logger.error(f"Error placing limit order: {e}")
+        # Create limit order action
+        tif = "Alo" if post_only else "Gtc"  # Alo = Add Liquidity Only, Gtc = Good Till Cancel
+        
+        action = {
+            "type": "order",
+            "orders": [self._order_wire(OrderSpec(symbol, side, size, price, reduce_only, tif))],
+            "grouping": "na"
+        }
+        
+        result = await self._post_order(action, "place limit order", symbol, leverage)
+        if result is None:
             return None
+        
+        logger.success(
+            "✅ Limit {} order placed: {} size={} price={} leverage={}x",
+            side.value, symbol, size, price, leverage
+        )
+        # Extract order ID from response
+        if result.get("status") == "ok" and result.get("response", {}).get("data"):
+            return _resting_oid(result)
+        return None
     
     async def close_position(
         self,
@@ -342,7 +622,7 @@ class TradeExecutor:
             Order ID if successful, None otherwise
         """
         if self.dry_run:
-            logger.info(f"🔵 DRY RUN: Would close {side.value} {size} {symbol}")
+            logger.info("🔵 DRY RUN: Would close {} {} {}", side.value, size, symbol)
             return f"dry_run_close_{symbol}_{int(time.time())}"
         
         return await self.execute_market_order(
@@ -363,37 +643,22 @@ class TradeExecutor:
             True if successful, False otherwise
         """
         if self.dry_run:
-            logger.info(f"🔵 DRY RUN: Would cancel order {order_id} for {symbol}")
+            logger.info("🔵 DRY RUN: Would cancel order {} for {}", order_id, symbol)
             return True
         
-        try:
-            action = {
-                "type": "cancel",
-                "cancels": [{
-                    "a": self.wallet_address,
-                    "o": order_id
-                }]
-            }
-            
-            signed_action = self._sign_action(action)
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.exchange_url,
-                    json=signed_action,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status == 200:
-                        logger.success(f"✅ Cancelled order {order_id} for {symbol}")
-                        return True
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to cancel order: {error_text}")
-                        return False
-                        
-        except Exception as e:
-            logger.error(f"Error cancelling order: {e}")
+        action = {
+            "type": "cancel",
+            "cancels": [{
+                "a": self.wallet_address,
+                "o": order_id
+            }]
+        }
+        
+        if await self._post_signed(action, "cancel order", parse_json=False) is None:
             return False
+        
+        logger.success("✅ Cancelled order {} for {}", order_id, symbol)
+        return True
     
     async def cancel_all_orders(self, symbol: Optional[str] = None) -> int:
         """Cancel all orders
@@ -405,39 +670,27 @@ class TradeExecutor:
             Number of orders cancelled
         """
         if self.dry_run:
-            logger.info(f"🔵 DRY RUN: Would cancel all orders{f' for {symbol}' if symbol else ''}")
+            logger.info("🔵 DRY RUN: Would cancel all orders{}", f" for {symbol}" if symbol else "")
             return 0
         
-        try:
-            action = {
-                "type": "cancelByCloid",
-                "cancels": [{
-                    "asset": symbol if symbol else None,
-                    "cloid": None  # Cancel all
-                }]
-            }
-            
-            signed_action = self._sign_action(action)
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.exchange_url,
-                    json=signed_action,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        count = len(result.get("response", {}).get("data", {}).get("statuses", []))
-                        logger.success(f"✅ Cancelled {count} orders{f' for {symbol}' if symbol else ''}")
-                        return count
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to cancel all orders: {error_text}")
-                        return 0
-                        
-        except Exception as e:
-            logger.error(f"Error cancelling all orders: {e}")
+        action = {
+            "type": "cancelByCloid",
+            "cancels": [{
+                "asset": symbol if symbol else None,
+                "cloid": None  # Cancel all
+            }]
+        }
+        
+        result = await self._post_signed(action, "cancel all orders")
+        if result is None:
             return 0
+        
+        try:
+            count = len(result["response"]["data"]["statuses"])
+        except (KeyError, TypeError):
+            count = 0
+        logger.success("✅ Cancelled {} orders{}", count, f" for {symbol}" if symbol else "")
+        return count
     
     async def _simulate_order(
         self,
@@ -461,17 +714,17 @@ class TradeExecutor:
         Returns:
             Simulated order ID
         """
-        order_id = f"sim_{symbol}_{int(time.time())}"
+        order_id = f"{_SIM_PREFIX}{symbol}_{next(self._sim_counter)}"
         
         if order_type == OrderType.MARKET:
             logger.info(
-                f"🔵 DRY RUN: Would execute MARKET {side.value} {symbol} "
-                f"size={size} leverage={leverage}x → Order ID: {order_id}"
+                "🔵 DRY RUN: Would execute MARKET {} {} size={} leverage={}x → Order ID: {}",
+                side.value, symbol, size, leverage, order_id
             )
         else:
             logger.info(
-                f"🔵 DRY RUN: Would place LIMIT {side.value} {symbol} "
-                f"size={size} price={price} leverage={leverage}x → Order ID: {order_id}"
+                "🔵 DRY RUN: Would place LIMIT {} {} size={} price={} leverage={}x → Order ID: {}",
+                side.value, symbol, size, price, leverage, order_id
             )
         
         return order_id
@@ -1,12 +1,74 @@
+import asyncio
 import json
+import threading
 import time
-from typing import Optional, Dict, Any
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
 from eth_account import Account
 from eth_account.signers.local import LocalAccount
 from loguru import logger
 
+from hyperliquid.api import API
 from hyperliquid.exchange import Exchange
 from hyperliquid.info import Info
+from hyperliquid.utils.error import Error as HyperliquidError
+
+
+# Errors an order call is expected to hit (bad input/response, network, SDK API
+# errors); anything else propagates instead of being swallowed
+_ORDER_ERRORS = (ValueError, KeyError, RuntimeError, OSError, HyperliquidError)
+
+
+def _statuses(result: Dict[str, Any]):
+    """Order statuses from an exchange response, or an empty tuple if absent"""
+    try:
+        return result["response"]["data"]["statuses"]
+    except (KeyError, TypeError):
+        return ()
+
+
+class _MetaCache:
+    """
+    Coin metadata (meta/spotMeta) persisted as JSON with a TTL, so restarts
+    within the TTL skip the metadata fetches the SDK does on construction
+    """
+    
+    def __init__(self, path: str = ".cache/hl_meta.json", ttl: float = 3600):
+        self.path = Path(path)
+        self.ttl = ttl
+    
+    def get(self, api_url: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return (meta, spot_meta) for api_url, fetching only when stale"""
+        try:
+            cached = json.loads(self.path.read_text())
+            if cached["api_url"] == api_url and time.time() - cached["fetched_at"] < self.ttl:
+                return cached["meta"], cached["spot_meta"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        
+        api = API(base_url=api_url)
+        meta = api.post("/info", {"type": "meta"})
+        spot_meta = api.post("/info", {"type": "spotMeta"})
+        
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps({
+                "api_url": api_url,
+                "fetched_at": time.time(),
+                "meta": meta,
+                "spot_meta": spot_meta
+            }))
+        except OSError as e:
+            logger.warning(f"Could not write metadata cache {self.path}: {e}")
+        
+        return meta, spot_meta
+
+
+_meta_cache = _MetaCache()
+
+# Mid prices reused for slippage pricing across orders placed within this window
+_MIDS_TTL = 1.0
 
 
 class TradeExecutor:
@@ -40,11 +102,24 @@ class TradeExecutor:
         self.exchange: Optional[Exchange] = None
         self.info: Optional[Info] = None
         
+        # Leverage already set on the exchange: (symbol, leverage, is_cross) -> monotonic time
+        self._leverage_cache: Dict[Tuple[str, int, bool], float] = {}
+        self._leverage_lock = threading.Lock()  # _set_leverage runs in SDK worker threads
+        self._leverage_ttl = 3600
+        
+        # Caps concurrent blocking SDK calls running in worker threads
+        self._sdk_semaphore = asyncio.Semaphore(8)
+        
+        # Latest all_mids() result and when it was fetched (monotonic)
+        self._mids: Dict[str, str] = {}
+        self._mids_at = 0.0
+        
         if private_key and not dry_run:
             try:
                 self.account = Account.from_key(private_key)
-                self.exchange = Exchange(self.account, base_url=api_url)
-                self.info = Info(base_url=api_url, skip_ws=True)
+                meta, spot_meta = _meta_cache.get(api_url)
+                self.exchange = Exchange(self.account, base_url=api_url, meta=meta, spot_meta=spot_meta)
+                self.info = Info(base_url=api_url, skip_ws=True, meta=meta, spot_meta=spot_meta)
                 logger.info(f"✅ Executor initialized for wallet: {self.account.address}")
                 logger.info("🚀 LIVE TRADING MODE - Real orders will be placed!")
             except Exception as e:
@@ -57,6 +132,38 @@ class TradeExecutor:
         if dry_run:
             logger.warning("⚠️ DRY RUN MODE - Trades will be simulated, not executed!")
     
+    async def _run_sdk(self, func, *args, **kwargs):
+        """Run a blocking SDK call in a worker thread so the event loop keeps running"""
+        async with self._sdk_semaphore:
+            return await asyncio.to_thread(func, *args, **kwargs)
+    
+    def _mid_price(self, symbol: str) -> float:
+        """Mid price for symbol, refetching all mids at most once per _MIDS_TTL"""
+        now = time.monotonic()
+        if now - self._mids_at >= _MIDS_TTL:
+            self._mids = self.info.all_mids()
+            self._mids_at = now
+        return float(self._mids[self.info.name_to_coin[symbol]])
+    
+    def _set_leverage(self, symbol: str, leverage: int, is_cross: bool = True):
+        """Update leverage unless the same value was set within the cache TTL"""
+        key = (symbol, leverage, is_cross)
+        set_at = self._leverage_cache.get(key)
+        if set_at is not None and time.monotonic() - set_at < self._leverage_ttl:
+            return
+        
+        try:
+            leverage_result = self.exchange.update_leverage(leverage, symbol, is_cross=is_cross)
+            logger.debug(f"Leverage set result: {leverage_result}")
+            if leverage_result.get("status") == "ok":
+                # A symbol has one leverage at a time, so drop its other entries
+                with self._leverage_lock:
+                    for cached in [k for k in self._leverage_cache if k[0] == symbol]:
+                        del self._leverage_cache[cached]
+                    self._leverage_cache[key] = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Failed to set leverage: {e}")
+    
     async def execute_market_order(
         self,
         symbol: str,
@@ -81,29 +188,28 @@ class TradeExecutor:
                 return None
             
             # Set leverage before placing order
-            try:
-                leverage_result = self.exchange.update_leverage(leverage, symbol, is_cross=True)
-                logger.debug(f"Leverage set result: {leverage_result}")
-            except Exception as e:
-                logger.warning(f"Failed to set leverage: {e}")
+            await self._run_sdk(self._set_leverage, symbol, leverage)
             
             # Use market_open with slippage tolerance
             # Market orders in Hyperliquid are aggressive IoC limit orders
             slippage = 0.03  # 3% slippage tolerance
             
-            result = self.exchange.market_open(
+            mid = await self._run_sdk(self._mid_price, symbol)
+            result = await self._run_sdk(
+                self.exchange.market_open,
                 symbol,
                 is_buy,
                 size,
+                px=mid,
                 slippage=slippage
             )
             
             if result.get("status") == "ok":
                 logger.success(f"✅ Market order executed successfully for {symbol}")
-                logger.debug(f"Response: {json.dumps(result, indent=2)}")
+                logger.opt(lazy=True).debug("Response: {}", lambda: json.dumps(result, indent=2))
                 
                 # Parse result
-                statuses = result.get("response", {}).get("data", {}).get("statuses", [])
+                statuses = _statuses(result)
                 if statuses:
                     status = statuses[0]
                     if "filled" in status:
@@ -124,10 +230,8 @@ class TradeExecutor:
                 logger.error(f"❌ Order failed: {result}")
                 return None
                 
-        except Exception as e:
-            logger.error(f"❌ Market order execution failed: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+        except _ORDER_ERRORS as e:
+            logger.exception(f"❌ Market order execution failed: {e}")
             return None
     
     async def execute_limit_order(
@@ -155,14 +259,11 @@ class TradeExecutor:
                 return None
             
             # Set leverage before placing order
-            try:
-                leverage_result = self.exchange.update_leverage(leverage, symbol, is_cross=True)
-                logger.debug(f"Leverage set result: {leverage_result}")
-            except Exception as e:
-                logger.warning(f"Failed to set leverage: {e}")
+            await self._run_sdk(self._set_leverage, symbol, leverage)
             
             # Place limit order with GTC (Good Till Cancelled)
-            result = self.exchange.order(
+            result = await self._run_sdk(
+                self.exchange.order,
                 symbol,
                 is_buy,
                 size,
@@ -173,10 +274,10 @@ class TradeExecutor:
             
             if result.get("status") == "ok":
                 logger.success(f"✅ Limit order placed successfully for {symbol}")
-                logger.debug(f"Response: {json.dumps(result, indent=2)}")
+                logger.opt(lazy=True).debug("Response: {}", lambda: json.dumps(result, indent=2))
                 
                 # Parse result
-                statuses = result.get("response", {}).get("data", {}).get("statuses", [])
+                statuses = _statuses(result)
                 if statuses:
                     status = statuses[0]
                     if "resting" in status:
@@ -208,10 +309,8 @@ class TradeExecutor:
                 logger.error(f"❌ Order failed: {result}")
                 return None
                 
-        except Exception as e:
-            logger.error(f"❌ Limit order execution failed: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+        except _ORDER_ERRORS as e:
+            logger.exception(f"❌ Limit order execution failed: {e}")
             return None
     
     async def close_position(
@@ -243,18 +342,21 @@ class TradeExecutor:
             # Use market_close with slippage tolerance
             slippage = 0.03  # 3% slippage tolerance
             
-            result = self.exchange.market_close(
+            mid = await self._run_sdk(self._mid_price, symbol)
+            result = await self._run_sdk(
+                self.exchange.market_close,
                 symbol,
                 sz=size,  # If None, closes entire position
+                px=mid,
                 slippage=slippage
             )
             
             if result.get("status") == "ok":
                 logger.success(f"✅ Position closed successfully for {symbol}")
-                logger.debug(f"Response: {json.dumps(result, indent=2)}")
+                logger.opt(lazy=True).debug("Response: {}", lambda: json.dumps(result, indent=2))
                 
                 # Parse result
-                statuses = result.get("response", {}).get("data", {}).get("statuses", [])
+                statuses = _statuses(result)
                 if statuses:
                     status = statuses[0]
                     if "filled" in status:
@@ -274,10 +376,8 @@ class TradeExecutor:
                 logger.error(f"❌ Close failed: {result}")
                 return None
                 
-        except Exception as e:
-            logger.error(f"❌ Position close failed: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+        except _ORDER_ERRORS as e:
+            logger.exception(f"❌ Position close failed: {e}")
             return None
     
     async def cancel_order(
@@ -304,11 +404,11 @@ class TradeExecutor:
                 logger.error("❌ Exchange not initialized for live trading")
                 return None
             
-            result = self.exchange.cancel(symbol, order_id)
+            result = await self._run_sdk(self.exchange.cancel, symbol, order_id)
             
             if result.get("status") == "ok":
                 logger.success(f"✅ Order cancelled successfully for {symbol}")
-                logger.debug(f"Response: {json.dumps(result, indent=2)}")
+                logger.opt(lazy=True).debug("Response: {}", lambda: json.dumps(result, indent=2))
                 return {
                     "success": True,
                     "symbol": symbol,
@@ -319,10 +419,8 @@ class TradeExecutor:
                 logger.error(f"❌ Cancel failed: {result}")
                 return None
                 
-        except Exception as e:
-            logger.error(f"❌ Order cancel failed: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+        except _ORDER_ERRORS as e:
+            logger.exception(f"❌ Order cancel failed: {e}")
             return None
     
     def _simulate_order(
@@ -337,10 +435,11 @@ class TradeExecutor:
     ) -> Dict[str, Any]:
         """Simulate an order for dry run mode"""
         simulated_price = price if price > 0 else 50000  # Mock price
+        now = time.time_ns()
         
         return {
             "success": True,
-            "order_id": f"SIM_{int(time.time())}",
+            "order_id": f"SIM_{now}",
             "symbol": symbol,
             "side": side,
             "size": size,
@@ -349,5 +448,184 @@ class TradeExecutor:
             "type": order_type,
             "reduce_only": reduce_only,
             "simulated": True,
-            "timestamp": int(time.time())
+            "timestamp": now // 1_000_000_000
         }
+
+
+@dataclass
+class PendingOrder:
+    """Order waiting in the BatchedExecutor queue"""
+    symbol: str
+    is_buy: bool
+    size: float
+    price: float
+    leverage: int
+    tif: str
+    reduce_only: bool
+    future: asyncio.Future
+
+
+class BatchedExecutor:
+    """
+    Coalesce orders arriving within a short window into one bulk request
+    """
+    
+    def __init__(
+        self,
+        executor: TradeExecutor,
+        interval: float = 0.1,
+        max_batch_size: int = 100
+    ):
+        """
+        Initialize batched executor
+        
+        Args:
+            executor: Executor whose SDK exchange submits the batches
+            interval: Seconds to wait for more orders after the first one arrives
+            max_batch_size: Submit immediately once this many orders are queued
+        """
+        self.executor = executor
+        self.interval = interval
+        self.max_batch_size = max_batch_size
+        self._queue: asyncio.Queue = asyncio.Queue()  # PendingOrder, or None to stop
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the background batching task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the batching task once everything queued so far has been submitted"""
+        if self._task:
+            # The sentinel lets the worker finish its batches and deliver their real
+            # results; cancelling could abandon a bulk request the exchange still fills
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+        
+        # Orders queued after the sentinel were never submitted
+        while not self._queue.empty():
+            order = self._queue.get_nowait()
+            if order is not None and not order.future.done():
+                order.future.set_result(None)
+    
+    async def submit_order(
+        self,
+        symbol: str,
+        side: str,  # "LONG" or "SHORT"
+        size: float,
+        price: float,
+        leverage: int,
+        reduce_only: bool = False,
+        tif: str = "Gtc"  # "Ioc" for aggressive market-style orders
+    ) -> Optional[Dict[str, Any]]:
+        """Queue an order and wait for its batch to be submitted"""
+        if self.executor.dry_run:
+            return self.executor._simulate_order(symbol, side, size, leverage, "limit", price, reduce_only)
+        
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(PendingOrder(
+            symbol=symbol,
+            is_buy=side == "LONG",
+            size=size,
+            price=price,
+            leverage=leverage,
+            tif=tif,
+            reduce_only=reduce_only,
+            future=future
+        ))
+        return await future
+    
+    async def _run(self):
+        """Drain the queue into batches of up to max_batch_size orders"""
+        loop = asyncio.get_running_loop()
+        batch: List[PendingOrder] = []
+        stopping = False
+        try:
+            while not stopping:
+                first = await self._queue.get()
+                if first is None:
+                    return
+                batch = [first]
+                deadline = loop.time() + self.interval
+                
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        order = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if order is None:
+                        stopping = True
+                        break
+                    batch.append(order)
+                
+                # Shielded so a cancelled worker still delivers results of a batch
+                # already handed to the exchange
+                submitting, batch = batch, []
+                await asyncio.shield(self._flush(submitting))
+        finally:
+            # Fail only orders that were collected but never submitted
+            for order in batch:
+                if not order.future.done():
+                    order.future.set_result(None)
+    
+    async def _flush(self, batch: List[PendingOrder]):
+        """Submit one batch and resolve each order's future"""
+        exchange = self.executor.exchange
+        try:
+            if not exchange:
+                raise RuntimeError("Exchange not initialized for live trading")
+            
+            # One leverage update per unique (symbol, leverage) in the batch
+            for symbol, leverage in {(o.symbol, o.leverage) for o in batch}:
+                await self.executor._run_sdk(self.executor._set_leverage, symbol, leverage)
+            
+            result = await self.executor._run_sdk(exchange.bulk_orders, [
+                {
+                    "coin": o.symbol,
+                    "is_buy": o.is_buy,
+                    "sz": o.size,
+                    "limit_px": o.price,
+                    "order_type": {"limit": {"tif": o.tif}},
+                    "reduce_only": o.reduce_only
+                }
+                for o in batch
+            ])
+        except Exception as e:
+            logger.error(f"❌ Batch of {len(batch)} orders failed: {e}")
+            for order in batch:
+                if not order.future.done():
+                    order.future.set_result(None)
+            return
+        
+        if result.get("status") != "ok":
+            logger.error(f"❌ Batch order failed: {result}")
+            statuses = []
+        else:
+            statuses = _statuses(result)
+            logger.success(f"✅ Submitted batch of {len(batch)} orders")
+        
+        for i, order in enumerate(batch):
+            if order.future.done():
+                continue
+            status = statuses[i] if i < len(statuses) else {}
+            placed = status.get("resting") or status.get("filled")
+            if placed:
+                order.future.set_result({
+                    "success": True,
+                    "order_id": placed.get("oid"),
+                    "symbol": order.symbol,
+                    "side": "LONG" if order.is_buy else "SHORT",
+                    "size": placed.get("totalSz", order.size),
+                    "price": placed.get("avgPx", order.price),
+                    "type": "limit"
+                })
+            else:
+                if "error" in status:
+                    logger.error(f"❌ Order error for {order.symbol}: {status['error']}")
+                order.future.set_result(None)
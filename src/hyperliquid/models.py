@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Optional, List
+from dataclasses import dataclass, field
+from typing import Optional, List, Tuple
 from datetime import datetime
 from enum import Enum
 
@@ -17,7 +17,7 @@ class PositionSide(str, Enum):
     LONG = "long"
     SHORT = "short"
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     """Represents an open position"""
     symbol: str
@@ -31,23 +31,46 @@ class Position:
     margin: Optional[float] = None
     timestamp: Optional[datetime] = None
     
+    # Derived values, recomputed only when the inputs they depend on change
+    _cache_key: Optional[Tuple[float, float, float, PositionSide]] = field(default=None, init=False, repr=False, compare=False)
+    _notional: float = field(default=0.0, init=False, repr=False, compare=False)
+    _pnl_pct: float = field(default=0.0, init=False, repr=False, compare=False)
+    
+    def _cache_inputs(self) -> Tuple[float, float, float, PositionSide]:
+        """Fields the cached values are derived from"""
+        return (self.current_price, self.size, self.entry_price, self.side)
+    
+    def _refresh_cache(self, key: Tuple[float, float, float, PositionSide]):
+        """Recompute derived values for the current price, size, entry and side"""
+        price = self.current_price
+        self._notional = self.size * price
+        
+        if self.entry_price == 0:
+            self._pnl_pct = 0.0
+        else:
+            # Side is compared once per recompute, not on every property read
+            sign = 1 if self.side == PositionSide.LONG else -1
+            self._pnl_pct = sign * (price - self.entry_price) / self.entry_price * 100
+        
+        self._cache_key = key
+    
     @property
     def notional_value(self) -> float:
         """Calculate notional value of position"""
-        return self.size * self.current_price
+        key = self._cache_inputs()
+        if key != self._cache_key:
+            self._refresh_cache(key)
+        return self._notional
     
     @property
     def pnl_percentage(self) -> float:
         """Calculate PnL percentage"""
-        if self.entry_price == 0:
-            return 0.0
-        
-        if self.side == PositionSide.LONG:
-            return ((self.current_price - self.entry_price) / self.entry_price) * 100
-        else:  # SHORT
-            return ((self.entry_price - self.current_price) / self.entry_price) * 100
+        key = self._cache_inputs()
+        if key != self._cache_key:
+            self._refresh_cache(key)
+        return self._pnl_pct
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     """Represents an order (open or filled)"""
     order_id: str
@@ -69,7 +92,7 @@ class Order:
     def is_open(self) -> bool:
         return self.status == "open"
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     """Represents a completed trade"""
     trade_id: str
@@ -81,7 +104,7 @@ class Trade:
     fee: Optional[float] = None
     order_id: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class UserState:
     """Represents the complete state of a user's account"""
     address: str
@@ -109,7 +132,7 @@ class UserState:
             return 0.0
         return (self.margin_used / self.balance) * 100
 
-@dataclass
+@dataclass(slots=True)
 class WebSocketUpdate:
     """Represents a WebSocket update event"""
     channel: str
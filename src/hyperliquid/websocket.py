@@ -1,35 +1,68 @@
 import asyncio
-import json
+import random
+import time
+import orjson
 import websockets
-from typing import Optional, Callable, Dict, Any
-from datetime import datetime
+from typing import Optional, Callable, Dict, Set, List, Tuple, Any
+from datetime import datetime, timezone
 from loguru import logger
 from .models import WebSocketUpdate
 
+# Minimum seconds between logged errors from the same callback
+_CALLBACK_ERROR_LOG_INTERVAL = 10.0
+
 class HyperliquidWebSocket:
     """
     WebSocket client for real-time Hyperliquid data
     """
     
     def __init__(self, ws_url: str = "wss://api.hyperliquid.xyz/ws"):
+        """
+        Args:
+            ws_url: Hyperliquid WebSocket URL
+        """
         self.ws_url = ws_url
         self.ws: Optional[websockets.WebSocketClientProtocol] = None
         self.is_running = False
         self.reconnect_delay = 5
-        self.subscriptions: Dict[str, Any] = {}
+        self._backoff = self.reconnect_delay
+        self._max_backoff = 60
+        self.subscriptions: Dict[str, str] = {}  # channel -> pre-encoded subscribe message
         self.callbacks: Dict[str, Callable] = {}
+        self._raw_callbacks: Set[str] = set()  # channels whose callback wants the raw message
+        # Dispatch tables: message channel -> [(subscription channel, callback, is_coroutine)]
+        # Exact channels (e.g. "allMids") and prefixes of "prefix:arg" channels (e.g. "user")
+        self._exact_callbacks: Dict[str, List[Tuple[str, Callable, bool]]] = {}
+        self._prefix_callbacks: Dict[str, List[Tuple[str, Callable, bool]]] = {}
+        self._callback_error_logged: Dict[str, float] = {}  # channel -> last error log time
+        
+        # allMids coalescing: latest mids are merged here and delivered by one consumer task
+        self._latest_mids: Dict[str, Any] = {}
+        self._mids_event = asyncio.Event()
+        self._mids_callback: Optional[Callable] = None
+        self._mids_is_coro = False
+        self._mids_task: Optional[asyncio.Task] = None
         
     async def connect(self):
         """Establish WebSocket connection"""
         try:
             logger.info(f"Connecting to Hyperliquid WebSocket: {self.ws_url}")
-            self.ws = await websockets.connect(self.ws_url)
+            self.ws = await websockets.connect(
+                self.ws_url,
+                compression=None,  # Messages are small JSON; deflate only costs CPU
+                max_size=4 * 2**20,  # Room for large allMids snapshots
+                ping_interval=20,
+                ping_timeout=20,  # Detect dead connections quickly so reconnect starts sooner
+                close_timeout=2
+            )
             self.is_running = True
+            self._backoff = self.reconnect_delay
+            self._ensure_mids_task()
             logger.info("WebSocket connected successfully")
             
             # Resubscribe to channels after reconnection
-            for channel, sub_data in self.subscriptions.items():
-                await self._send_subscription(sub_data)
+            for channel, payload in self.subscriptions.items():
+                await self._send_subscription(payload)
                 
         except Exception as e:
             logger.error(f"Failed to connect to WebSocket: {e}")
@@ -42,22 +75,38 @@ class HyperliquidWebSocket:
             await self.ws.close()
             logger.info("WebSocket disconnected")
     
-    async def _send_subscription(self, data: dict):
-        """Send subscription message"""
+    def _register_callback(self, channel: str, callback: Callable, raw: bool):
+        """Store a callback and index it by the message channel it handles"""
+        self.callbacks[channel] = callback
+        if raw:
+            self._raw_callbacks.add(channel)
+        else:
+            self._raw_callbacks.discard(channel)
+        
+        # "user:0x..." is delivered on channel "user", "allMids" on "allMids"
+        key, sep, _ = channel.partition(":")
+        table = self._prefix_callbacks if sep else self._exact_callbacks
+        entries = [e for e in table.get(key, []) if e[0] != channel]
+        entries.append((channel, callback, asyncio.iscoroutinefunction(callback)))
+        table[key] = entries
+    
+    async def _send_subscription(self, payload: str):
+        """Send a pre-encoded subscription message"""
         if self.ws:
             try:
-                await self.ws.send(json.dumps(data))
-                logger.debug(f"Sent subscription: {data}")
+                await self.ws.send(payload)
+                logger.debug(f"Sent subscription: {payload}")
             except Exception as e:
                 logger.error(f"Failed to send subscription: {e}")
     
-    async def subscribe_user(self, address: str, callback: Optional[Callable] = None):
+    async def subscribe_user(self, address: str, callback: Optional[Callable] = None, raw: bool = False):
         """
         Subscribe to user updates (positions, orders, fills)
         
         Args:
             address: Wallet address to monitor
             callback: Function to call when updates are received
+            raw: If True, callback receives the raw message instead of a WebSocketUpdate
         """
         channel = f"user:{address}"
         
@@ -69,22 +118,25 @@ class HyperliquidWebSocket:
             }
         }
         
-        self.subscriptions[channel] = subscription
+        # Encoded once and reused on every reconnect (sent as a text frame)
+        payload = orjson.dumps(subscription).decode()
+        self.subscriptions[channel] = payload
         if callback:
-            self.callbacks[channel] = callback
+            self._register_callback(channel, callback, raw)
         
         if self.ws:
-            await self._send_subscription(subscription)
+            await self._send_subscription(payload)
         
         logger.info(f"Subscribed to user updates for {address}")
     
-    async def subscribe_trades(self, symbol: str, callback: Optional[Callable] = None):
+    async def subscribe_trades(self, symbol: str, callback: Optional[Callable] = None, raw: bool = False):
         """
         Subscribe to trade updates for a specific symbol
         
         Args:
             symbol: Trading pair symbol (e.g., "BTC")
             callback: Function to call when trades are received
+            raw: If True, callback receives the raw message instead of a WebSocketUpdate
         """
         channel = f"trades:{symbol}"
         
@@ -96,21 +148,24 @@ class HyperliquidWebSocket:
             }
         }
         
-        self.subscriptions[channel] = subscription
+        # Encoded once and reused on every reconnect (sent as a text frame)
+        payload = orjson.dumps(subscription).decode()
+        self.subscriptions[channel] = payload
         if callback:
-            self.callbacks[channel] = callback
+            self._register_callback(channel, callback, raw)
         
         if self.ws:
-            await self._send_subscription(subscription)
+            await self._send_subscription(payload)
         
         logger.info(f"Subscribed to trades for {symbol}")
     
-    async def subscribe_all_mids(self, callback: Optional[Callable] = None):
+    async def subscribe_all_mids(self, callback: Optional[Callable] = None, raw: bool = False):
         """
         Subscribe to all mid prices
         
         Args:
             callback: Function to call when price updates are received
+            raw: If True, callback receives the raw message instead of a WebSocketUpdate
         """
         channel = "allMids"
         
@@ -121,82 +176,106 @@ class HyperliquidWebSocket:
             }
         }
         
-        self.subscriptions[channel] = subscription
-        if callback:
-            self.callbacks[channel] = callback
+        # Encoded once and reused on every reconnect (sent as a text frame)
+        payload = orjson.dumps(subscription).decode()
+        self.subscriptions[channel] = payload
+        if callback and raw:
+            self._register_callback(channel, callback, raw)
+        elif callback:
+            # Updates are coalesced: a slow callback gets the latest mids, not a backlog
+            self._mids_callback = callback
+            self._mids_is_coro = asyncio.iscoroutinefunction(callback)
+            self._register_callback(channel, self._merge_mids, False)
+            self._ensure_mids_task()
         
         if self.ws:
-            await self._send_subscription(subscription)
+            await self._send_subscription(payload)
         
         logger.info("Subscribed to all mid prices")
     
+    def _ensure_mids_task(self):
+        """(Re)start the allMids dispatcher if a callback needs it and it isn't running"""
+        if self._mids_callback and (self._mids_task is None or self._mids_task.done()):
+            self._mids_task = asyncio.create_task(self._dispatch_mids())
+    
+    def _log_callback_error(self, channel: str, error: Exception):
+        """Log a callback error, throttled so a callback failing on every message can't flood the log"""
+        now = time.monotonic()
+        if now - self._callback_error_logged.get(channel, 0.0) >= _CALLBACK_ERROR_LOG_INTERVAL:
+            self._callback_error_logged[channel] = now
+            logger.exception(f"Error in callback for {channel}: {error}")
+    
+    def _merge_mids(self, update: WebSocketUpdate):
+        """Merge an allMids update into the latest prices and wake the dispatcher"""
+        self._latest_mids.update(update.data.get("data", {}).get("mids", {}))
+        self._mids_event.set()
+    
+    async def _dispatch_mids(self):
+        """Deliver the latest merged mids to the allMids callback, once per wake-up"""
+        while True:
+            await self._mids_event.wait()
+            self._mids_event.clear()
+            
+            update = WebSocketUpdate(
+                channel="allMids",
+                data={"channel": "allMids", "data": {"mids": dict(self._latest_mids)}},
+                timestamp=datetime.now(timezone.utc)
+            )
+            try:
+                if self._mids_is_coro:
+                    await self._mids_callback(update)
+                else:
+                    self._mids_callback(update)
+            except Exception as e:
+                self._log_callback_error("allMids", e)
+    
     async def _handle_message(self, message: str):
         """Handle incoming WebSocket message"""
         try:
-            # Log RAW message
-            logger.info(f"📨 RAW WebSocket Message: {message[:500]}...")  # First 500 chars
+            # Per-message logs are TRACE and use deferred formatting to stay off the hot path
+            logger.trace("📨 RAW WebSocket Message: {}", message)
             
-            data = json.loads(message)
+            data = orjson.loads(message)
             
             # Determine the channel/type of update
             channel = data.get("channel", "unknown")
             
-            # Log the parsed data
-            logger.info(f"📦 Parsed - Channel: '{channel}', Keys: {list(data.keys())}")
+            logger.trace("📦 Parsed - Channel: '{}'", channel)
             
-            # Create update object
-            update = WebSocketUpdate(
-                channel=channel,
-                data=data,
-                timestamp=datetime.utcnow()
-            )
+            # Update object is built on first matching callback and shared
+            update = None
             
-            # Call appropriate callback
-            callback_found = False
-            for callback_channel, callback in self.callbacks.items():
-                logger.info(f"🔍 Checking callback: {callback_channel} vs {channel}")
-                
-                # Match logic:
-                # 1. Exact match: channel == callback_channel
-                # 2. Callback is substring of channel: callback_channel in channel
-                # 3. Channel is substring of callback: channel in callback_channel (for "user" matching "user:0x...")
-                # 4. Both start with same prefix before colon (for user:address matching user channel)
-                should_call = False
-                if channel == callback_channel:
-                    should_call = True
-                elif callback_channel in channel:
-                    should_call = True
-                elif channel in callback_channel:
-                    should_call = True
-                elif ":" in callback_channel:
-                    # Check if channel matches the prefix (e.g., "user" matches "user:0x...")
-                    prefix = callback_channel.split(":")[0]
-                    if channel == prefix:
-                        should_call = True
-                
-                if should_call:
-                    callback_found = True
-                    logger.info(f"✅ Calling callback for {callback_channel}")
-                    try:
-                        if asyncio.iscoroutinefunction(callback):
-                            await callback(update)
-                        else:
-                            callback(update)
-                    except Exception as e:
-                        logger.error(f"Error in callback for {callback_channel}: {e}")
-                        import traceback
-                        logger.error(traceback.format_exc())
+            # Call appropriate callbacks
+            callbacks = self._exact_callbacks.get(channel) or self._prefix_callbacks.get(channel)
+            callback_found = bool(callbacks)
+            for callback_channel, callback, is_coro in callbacks or ():
+                logger.trace("✅ Calling callback for {}", callback_channel)
+                if callback_channel in self._raw_callbacks:
+                    payload = message
+                else:
+                    if update is None:
+                        update = WebSocketUpdate(
+                            channel=channel,
+                            data=data,
+                            timestamp=datetime.now(timezone.utc)
+                        )
+                    payload = update
+                try:
+                    if is_coro:
+                        await callback(payload)
+                    else:
+                        callback(payload)
+                except Exception as e:
+                    self._log_callback_error(callback_channel, e)
             
             if not callback_found:
                 logger.warning(f"⚠️ No callback found for channel: {channel}")
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse WebSocket message: {e}")
             logger.error(f"Raw message: {message}")
         except Exception as e:
-            logger.error(f"Error handling WebSocket message: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"Error handling WebSocket message: {e}")
     
     async def listen(self):
         """
@@ -205,19 +284,29 @@ class HyperliquidWebSocket:
         """
         while self.is_running:
             try:
-                if not self.ws or self.ws.closed:
+                if self.ws is None:
                     await self.connect()
                 
                 async for message in self.ws:
                     await self._handle_message(message)
+                
+                # Iteration ends without raising on a clean close
+                self.ws = None
                     
             except websockets.exceptions.ConnectionClosed:
-                logger.warning(f"WebSocket connection closed, reconnecting in {self.reconnect_delay}s...")
-                await asyncio.sleep(self.reconnect_delay)
+                self.ws = None
+                logger.warning(f"WebSocket connection closed, reconnecting in ~{self._backoff}s...")
+                await self._sleep_backoff()
                 
             except Exception as e:
+                self.ws = None
                 logger.error(f"Error in WebSocket listener: {e}")
-                await asyncio.sleep(self.reconnect_delay)
+                await self._sleep_backoff()
+    
+    async def _sleep_backoff(self):
+        """Wait before reconnecting, doubling the delay (with jitter) up to the max"""
+        await asyncio.sleep(self._backoff + random.uniform(0, self._backoff * 0.3))
+        self._backoff = min(self._backoff * 2, self._max_backoff)
     
     async def run(self):
         """Start the WebSocket connection and listening loop"""
@@ -227,4 +316,7 @@ class HyperliquidWebSocket:
     async def stop(self):
         """Stop the WebSocket connection"""
         self.is_running = False
+        if self._mids_task:
+            self._mids_task.cancel()
+            self._mids_task = None
         await self.disconnect()
@@ -702,6 +702,24 @@ async def handle_resume():
     logger.info("▶️ Bot resumed by Telegram command")
 
 
+async def stop_telegram():
+    """
+    Send the shutdown notification, flush the notifier, then stop the Telegram bot.
+    The notifier sends through the bot's HTTP client, so it has to be flushed
+    before the bot shuts that client down. Safe to call more than once.
+    """
+    global telegram_bot, notifier
+    
+    if notifier:
+        await notifier.send_shutdown_notification()
+        await notifier.stop()
+        notifier = None
+    
+    if telegram_bot:
+        await telegram_bot.stop()
+        telegram_bot = None
+
+
 async def handle_stop(close_positions: bool = False):
     """Handle stop request from Telegram"""
     logger.warning(f"🛑 Stop requested from Telegram (close_positions={close_positions})")
@@ -720,9 +738,8 @@ async def handle_stop(close_positions: bool = False):
     if monitor:
         await monitor.stop_monitoring()
     
-    # Stop Telegram bot
-    if telegram_bot:
-        await telegram_bot.stop()
+    # Send the shutdown notification and stop the Telegram bot
+    await stop_telegram()
     
     # Exit
     import sys
@@ -985,14 +1002,12 @@ async def main():
     if settings.telegram.bot_token and settings.telegram.chat_id:
         logger.info("🤖 Initializing Telegram bot...")
         
-        notifier = NotificationService(
-            settings.telegram.bot_token,
-            settings.telegram.chat_id
-        )
-        
         telegram_bot = TelegramBot(
             settings.telegram.bot_token,
-            settings.telegram.chat_id
+            settings.telegram.chat_id,
+            webhook_url=settings.telegram.webhook_url,
+            webhook_port=settings.telegram.webhook_port,
+            webhook_secret=settings.telegram.webhook_secret
         )
         
         # Set up Telegram callbacks
@@ -1007,6 +1022,14 @@ async def main():
         # Start Telegram bot
         await telegram_bot.start()
         
+        # Notifications go through the running bot's HTTP client
+        notifier = NotificationService(
+            settings.telegram.bot_token,
+            settings.telegram.chat_id,
+            bot=telegram_bot.app.bot,
+            trade_digest_window=settings.telegram.trade_digest_window
+        )
+        
         # Start hourly reports task
         asyncio.create_task(send_hourly_reports())
         
@@ -1077,16 +1100,15 @@ async def main():
     finally:
         logger.info("🛑 Stopping monitoring...")
         
-        # Send shutdown notification
-        if notifier:
-            await notifier.send_shutdown_notification()
+        # Send shutdown notification and stop the Telegram bot (no-op if /stop already did)
+        await stop_telegram()
         
         # Stop components
         if monitor:
             await monitor.stop_monitoring()
         
-        if telegram_bot:
-            await telegram_bot.stop()
+        if executor:
+            await executor.aclose()
         
         logger.info("👋 Bot stopped gracefully")
 
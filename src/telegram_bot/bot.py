@@ -1,25 +1,161 @@
+from __future__ import annotations
+
 import asyncio
-from typing import Optional, Callable
-from datetime import datetime
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import (
-    Application,
-    CommandHandler,
-    CallbackQueryHandler,
-    ContextTypes
-)
+import functools
+import time
+from typing import TYPE_CHECKING, Optional, Callable, Dict, Tuple, Awaitable
 from loguru import logger
 
+from .notifications import build_request, utc_timestamp
+
+# python-telegram-bot is imported when the bot starts, so processes that never
+# enable Telegram don't pay its import cost
+if TYPE_CHECKING:
+    from telegram import Update, InlineKeyboardMarkup
+    from telegram.ext import Application, ContextTypes
+
+
+# Order side and type as displayed in /orders
+_SIDE_MAP = {"buy": "BUY", "sell": "SELL"}
+_ORDER_TYPE_MAP = {
+    "market": "MARKET",
+    "limit": "LIMIT",
+    "stop_market": "STOP_MARKET",
+    "stop_limit": "STOP_LIMIT"
+}
+
+# /orders replies are split after this many orders or characters
+_ORDERS_PER_MESSAGE = 20
+_MAX_CHUNK_CHARS = 3500
+
+# How long /status, /positions and /pnl replies are reused (seconds)
+_REPLY_CACHE_TTL = 2.0
+
+# Static reply bodies
+_START_TEXT = """🤖 <b>Hyperliquid Copy Trading Bot</b>
+
+<b>Available Commands:</b>
+
+/status - Current bot status
+/positions - View open positions  
+/orders - View open orders
+/pnl - Account PnL summary
+/pause - Pause copying (keep positions)
+/resume - Resume copying
+/stop - Stop bot and close positions
+
+<b>Status:</b> 🟢 Active"""
+
+_STOP_PROMPT_TEXT = (
+    "⚠️ <b>STOP COPY TRADING</b>\n\n"
+    "This will:\n"
+    "✅ Stop copying new trades\n"
+    "✅ Cancel all open orders\n\n"
+    "Do you want to close all positions too?"
+)
+
+_PNL_TMPL = """💰 <b>Account PnL Summary</b>
+
+<b>Session:</b>
+• Total Trades: 0
+• Winners: 0
+• Losers: 0
+• Win Rate: 0%
+
+<b>PnL:</b>
+• Today: $0.00 (0%)
+• This Week: $0.00 (0%)
+• Total: $0.00 (0%)
+
+🕐 <i>Updated: {}</i>"""
+
+
+@functools.lru_cache(maxsize=None)
+def _stop_markup() -> InlineKeyboardMarkup:
+    """/stop confirmation keyboard; callback data is static, so it is built once"""
+    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+    
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("Close Positions", callback_data="stop_close"),
+            InlineKeyboardButton("Keep Positions", callback_data="stop_keep")
+        ],
+        [InlineKeyboardButton("❌ Cancel", callback_data="stop_cancel")]
+    ])
+
 
 class TelegramBot:
     """
     Telegram bot for controlling and monitoring the copy trader
     """
     
+    __slots__ = (
+        "bot_token",
+        "allowed_chat_id",
+        "_allowed_chat_id_int",
+        "webhook_url",
+        "webhook_port",
+        "webhook_secret",
+        "app",
+        "on_stop_requested",
+        "on_pause_requested",
+        "on_resume_requested",
+        "get_status_callback",
+        "get_positions_callback",
+        "get_orders_callback",
+        "get_pnl_callback",
+        "_cache"
+    )
+    
+    # Bot command -> handler method name
+    _COMMANDS = (
+        ("start", "_start_command"),
+        ("status", "_status_command"),
+        ("positions", "_positions_command"),
+        ("orders", "_orders_command"),
+        ("pause", "_pause_command"),
+        ("resume", "_resume_command"),
+        ("stop", "_stop_command"),
+        ("pnl", "_pnl_command")
+    )
+    
+    # Button callback data -> (text shown first, close_positions, text once stopped);
+    # close_positions None means the button only edits the message
+    _CB_TABLE = {
+        "stop_close": (
+            "🛑 <b>Stopping bot...</b>\n\n"
+            "• Cancelling all orders\n"
+            "• Closing all positions\n"
+            "• Shutting down\n\n"
+            "Please wait...",
+            True,
+            "✅ <b>Bot Stopped</b>\n\n"
+            "All orders cancelled.\n"
+            "All positions closed.\n"
+            "Status: 🔴 INACTIVE"
+        ),
+        "stop_keep": (
+            "🛑 <b>Stopping bot...</b>\n\n"
+            "• Cancelling all orders\n"
+            "• Keeping positions open\n"
+            "• Shutting down\n\n"
+            "Please wait...",
+            False,
+            "✅ <b>Bot Stopped</b>\n\n"
+            "All orders cancelled.\n"
+            "Positions kept open.\n"
+            "Status: 🔴 INACTIVE"
+        ),
+        "stop_cancel": ("✅ Stop cancelled. Bot is still running.", None, None)
+    }
+    
     def __init__(
         self,
         bot_token: str,
-        allowed_chat_id: str
+        allowed_chat_id: str,
+        webhook_url: Optional[str] = None,
+        webhook_port: int = 8443,
+        webhook_secret: Optional[str] = None
     ):
         """
         Initialize Telegram bot
@@ -27,9 +163,17 @@ class TelegramBot:
         Args:
             bot_token: Telegram bot token from BotFather
             allowed_chat_id: Only this chat ID can control the bot
+            webhook_url: Public HTTPS URL for Telegram to push updates to;
+                if None, updates are fetched by long polling
+            webhook_port: Local port the webhook listener binds to
+            webhook_secret: Secret token Telegram sends with each webhook update
         """
         self.bot_token = bot_token
         self.allowed_chat_id = str(allowed_chat_id)
+        self._allowed_chat_id_int = int(allowed_chat_id)
+        self.webhook_url = webhook_url
+        self.webhook_port = webhook_port
+        self.webhook_secret = webhook_secret
         self.app: Optional[Application] = None
         
         # Callbacks that main app can set
@@ -41,15 +185,27 @@ class TelegramBot:
         self.get_orders_callback: Optional[Callable] = None
         self.get_pnl_callback: Optional[Callable] = None
         
+        # Recent command replies: command -> (monotonic time, text)
+        self._cache: Dict[str, Tuple[float, str]] = {}
+        
         logger.info(f"Telegram bot initialized for chat {allowed_chat_id}")
     
     def _check_authorized(self, update: Update) -> bool:
         """Check if user is authorized"""
-        user_chat_id = str(update.effective_chat.id)
-        if user_chat_id != self.allowed_chat_id:
-            logger.warning(f"Unauthorized access attempt from chat {user_chat_id}")
-            return False
-        return True
+        if update.effective_chat.id == self._allowed_chat_id_int:
+            return True
+        logger.warning(f"Unauthorized access attempt from chat {update.effective_chat.id}")
+        return False
+    
+    async def _cached(self, key: str, fn: Callable[[], Awaitable[str]], ttl: float = _REPLY_CACHE_TTL) -> str:
+        """Return the reply cached under key if younger than ttl, else await fn and cache it"""
+        now = time.monotonic()
+        cached = self._cache.get(key)
+        if cached is not None and now - cached[0] < ttl:
+            return cached[1]
+        text = await fn()
+        self._cache[key] = (now, text)
+        return text
     
     async def _start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
@@ -57,22 +213,7 @@ class TelegramBot:
             await update.message.reply_text("⛔ Unauthorized")
             return
         
-        message = """
-🤖 <b>Hyperliquid Copy Trading Bot</b>
-
-<b>Available Commands:</b>
-
-/status - Current bot status
-/positions - View open positions  
-/orders - View open orders
-/pnl - Account PnL summary
-/pause - Pause copying (keep positions)
-/resume - Resume copying
-/stop - Stop bot and close positions
-
-<b>Status:</b> 🟢 Active
-        """
-        await update.message.reply_text(message.strip(), parse_mode="HTML")
+        await update.message.reply_text(_START_TEXT, parse_mode="HTML")
     
     async def _status_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /status command"""
@@ -82,7 +223,7 @@ class TelegramBot:
         
         if self.get_status_callback:
             try:
-                status = await self.get_status_callback()
+                status = await self._cached("status", self.get_status_callback)
                 await update.message.reply_text(status, parse_mode="HTML")
             except Exception as e:
                 logger.error(f"Error getting status: {e}")
@@ -98,7 +239,7 @@ class TelegramBot:
         
         if self.get_positions_callback:
             try:
-                positions = await self.get_positions_callback()
+                positions = await self._cached("positions", self.get_positions_callback)
                 await update.message.reply_text(positions, parse_mode="HTML")
             except Exception as e:
                 logger.error(f"Error getting positions: {e}")
@@ -120,22 +261,35 @@ class TelegramBot:
                     await update.message.reply_text("📋 No open orders")
                     return
                 
-                message = "<b>Open Orders</b>\n\n"
+                # Sent in chunks as they fill, so long lists start showing early
+                # and no message exceeds Telegram's length limit
+                parts = ["<b>Open Orders</b>\n\n"]
+                length = len(parts[0])
+                in_chunk = 0
                 for i, order in enumerate(orders, 1):
-                    side = order.get('side', 'BUY').upper()
-                    order_type = order.get('order_type', 'LIMIT').upper()
+                    side = order.get('side', 'buy')
+                    side = _SIDE_MAP.get(side) or side.upper()
+                    order_type = order.get('order_type', 'limit')
+                    order_type = _ORDER_TYPE_MAP.get(order_type) or order_type.upper()
                     
-                    message += f"<b>{i}. {order['symbol']} {side}</b>\n"
-                    message += f"   Type: {order_type}\n"
-                    message += f"   Size: {abs(order['size']):.4f}\n"
-                    message += f"   Price: ${order['price']:,.2f}\n"
-                    
-                    if 'trigger_price' in order and order['trigger_price']:
-                        message += f"   Trigger: ${order['trigger_price']:,.2f}\n"
+                    block = (
+                        f"<b>{i}. {order['symbol']} {side}</b>\n"
+                        f"   Type: {order_type}\n"
+                        f"   Size: {abs(order['size']):.4f}\n"
+                        f"   Price: ${order['price']:,.2f}\n"
+                    )
+                    if order.get('trigger_price'):
+                        block += f"   Trigger: ${order['trigger_price']:,.2f}\n"
+                    block += "\n"
                     
-                    message += "\n"
+                    if in_chunk and (in_chunk == _ORDERS_PER_MESSAGE or length + len(block) > _MAX_CHUNK_CHARS):
+                        await update.message.reply_text("".join(parts).strip(), parse_mode="HTML")
+                        parts, length, in_chunk = [], 0, 0
+                    parts.append(block)
+                    length += len(block)
+                    in_chunk += 1
                 
-                await update.message.reply_text(message.strip(), parse_mode="HTML")
+                await update.message.reply_text("".join(parts).strip(), parse_mode="HTML")
             except Exception as e:
                 logger.error(f"Error getting orders: {e}")
                 await update.message.reply_text(f"❌ Error: {e}")
@@ -151,6 +305,7 @@ class TelegramBot:
         if self.on_pause_requested:
             try:
                 await self.on_pause_requested()
+                self._cache.clear()
                 await update.message.reply_text(
                     "⏸️ <b>Bot Paused</b>\n\nNo new trades will be copied.\nExisting positions remain open.",
                     parse_mode="HTML"
@@ -170,6 +325,7 @@ class TelegramBot:
         if self.on_resume_requested:
             try:
                 await self.on_resume_requested()
+                self._cache.clear()
                 await update.message.reply_text(
                     "▶️ <b>Bot Resumed</b>\n\nCopying trades is now active!",
                     parse_mode="HTML"
@@ -186,22 +342,9 @@ class TelegramBot:
             await update.message.reply_text("⛔ Unauthorized")
             return
         
-        keyboard = [
-            [
-                InlineKeyboardButton("Close Positions", callback_data="stop_close"),
-                InlineKeyboardButton("Keep Positions", callback_data="stop_keep")
-            ],
-            [InlineKeyboardButton("❌ Cancel", callback_data="stop_cancel")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await update.message.reply_text(
-            "⚠️ <b>STOP COPY TRADING</b>\n\n"
-            "This will:\n"
-            "✅ Stop copying new trades\n"
-            "✅ Cancel all open orders\n\n"
-            "Do you want to close all positions too?",
-            reply_markup=reply_markup,
+            _STOP_PROMPT_TEXT,
+            reply_markup=_stop_markup(),
             parse_mode="HTML"
         )
     
@@ -214,55 +357,31 @@ class TelegramBot:
             await query.edit_message_text("⛔ Unauthorized")
             return
         
-        if query.data == "stop_close":
-            await query.edit_message_text(
-                "🛑 <b>Stopping bot...</b>\n\n"
-                "• Cancelling all orders\n"
-                "• Closing all positions\n"
-                "• Shutting down\n\n"
-                "Please wait...",
-                parse_mode="HTML"
-            )
-            if self.on_stop_requested:
-                try:
-                    await self.on_stop_requested(close_positions=True)
-                    await query.edit_message_text(
-                        "✅ <b>Bot Stopped</b>\n\n"
-                        "All orders cancelled.\n"
-                        "All positions closed.\n"
-                        "Status: 🔴 INACTIVE",
-                        parse_mode="HTML"
-                    )
-                except Exception as e:
-                    await query.edit_message_text(f"❌ Error: {e}")
+        entry = self._CB_TABLE.get(query.data)
+        if entry is None:
+            return
+        text, close_positions, done_text = entry
         
-        elif query.data == "stop_keep":
-            await query.edit_message_text(
-                "🛑 <b>Stopping bot...</b>\n\n"
-                "• Cancelling all orders\n"
-                "• Keeping positions open\n"
-                "• Shutting down\n\n"
-                "Please wait...",
-                parse_mode="HTML"
-            )
-            if self.on_stop_requested:
-                try:
-                    await self.on_stop_requested(close_positions=False)
-                    await query.edit_message_text(
-                        "✅ <b>Bot Stopped</b>\n\n"
-                        "All orders cancelled.\n"
-                        "Positions kept open.\n"
-                        "Status: 🔴 INACTIVE",
-                        parse_mode="HTML"
-                    )
-                except Exception as e:
-                    await query.edit_message_text(f"❌ Error: {e}")
+        if close_positions is None:
+            await query.edit_message_text(text)
+            return
         
-        elif query.data == "stop_cancel":
-            await query.edit_message_text(
-                "✅ Stop cancelled. Bot is still running.",
-                parse_mode="HTML"
-            )
+        # Show progress while the stop runs instead of before it
+        progress = asyncio.create_task(query.edit_message_text(text, parse_mode="HTML"))
+        if self.on_stop_requested:
+            try:
+                await self.on_stop_requested(close_positions=close_positions)
+                self._cache.clear()
+            except Exception as e:
+                await asyncio.gather(progress, return_exceptions=True)
+                await query.edit_message_text(f"❌ Error: {e}")
+                return
+            
+            # A failed progress edit doesn't make a successful stop an error
+            await asyncio.gather(progress, return_exceptions=True)
+            await query.edit_message_text(done_text, parse_mode="HTML")
+        else:
+            await progress
     
     async def _pnl_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /pnl command"""
@@ -270,52 +389,60 @@ class TelegramBot:
             await update.message.reply_text("⛔ Unauthorized")
             return
         
+        message = await self._cached("pnl", self._build_pnl_message)
+        await update.message.reply_text(message, parse_mode="HTML")
+    
+    async def _build_pnl_message(self) -> str:
+        """Build the /pnl summary"""
         # TODO: Get actual PnL from database
-        message = """
-💰 <b>Account PnL Summary</b>
-
-<b>Session:</b>
-• Total Trades: 0
-• Winners: 0
-• Losers: 0
-• Win Rate: 0%
-
-<b>PnL:</b>
-• Today: $0.00 (0%)
-• This Week: $0.00 (0%)
-• Total: $0.00 (0%)
-
-🕐 <i>Updated: {}</i>
-        """.format(datetime.now().strftime('%H:%M:%S UTC'))
-        
-        await update.message.reply_text(message.strip(), parse_mode="HTML")
+        return _PNL_TMPL.format(utc_timestamp())
     
     async def start(self):
         """Start the Telegram bot"""
         logger.info("Starting Telegram bot...")
         
-        # Create application
-        self.app = Application.builder().token(self.bot_token).build()
+        from telegram.ext import (
+            AIORateLimiter,
+            Application,
+            CommandHandler,
+            CallbackQueryHandler,
+            filters
+        )
+        
+        # Create application; updates are handled concurrently so a slow command
+        # doesn't hold up the next one, and the rate limiter handles flood waits
+        self.app = (
+            Application.builder()
+            .token(self.bot_token)
+            .request(build_request())
+            .concurrent_updates(True)
+            .rate_limiter(AIORateLimiter())
+            .build()
+        )
         
-        # Add command handlers
-        self.app.add_handler(CommandHandler("start", self._start_command))
-        self.app.add_handler(CommandHandler("status", self._status_command))
-        self.app.add_handler(CommandHandler("positions", self._positions_command))
-        self.app.add_handler(CommandHandler("orders", self._orders_command))
-        self.app.add_handler(CommandHandler("pause", self._pause_command))
-        self.app.add_handler(CommandHandler("resume", self._resume_command))
-        self.app.add_handler(CommandHandler("stop", self._stop_command))
-        self.app.add_handler(CommandHandler("pnl", self._pnl_command))
+        # Add command handlers; updates from other chats are dropped before dispatch
+        chat_filter = filters.Chat(self._allowed_chat_id_int)
+        for name, attr in self._COMMANDS:
+            self.app.add_handler(CommandHandler(name, getattr(self, attr), filters=chat_filter))
         
         # Add callback query handler for buttons
         self.app.add_handler(CallbackQueryHandler(self._button_callback))
         
-        # Start polling
         await self.app.initialize()
         await self.app.start()
-        await self.app.updater.start_polling()
         
-        logger.info("✅ Telegram bot started and polling")
+        # Webhook lets Telegram push updates; polling is the fallback
+        if self.webhook_url:
+            await self.app.updater.start_webhook(
+                listen="0.0.0.0",
+                port=self.webhook_port,
+                secret_token=self.webhook_secret,
+                webhook_url=self.webhook_url
+            )
+            logger.info(f"✅ Telegram bot started with webhook {self.webhook_url}")
+        else:
+            await self.app.updater.start_polling()
+            logger.info("✅ Telegram bot started and polling")
     
     async def stop(self):
         """Stop the Telegram bot"""
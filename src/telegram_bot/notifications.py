@@ -1,45 +1,341 @@
+from __future__ import annotations
+
 import asyncio
-from typing import Optional
-from datetime import datetime
-from telegram import Bot
+import functools
+import heapq
+import itertools
+import time
+from typing import TYPE_CHECKING, Optional, Dict, List, Tuple, Any
+import orjson
 from loguru import logger
 
+# python-telegram-bot is imported on first use (see _orjson_request_class)
+if TYPE_CHECKING:
+    from telegram import Bot
+    from telegram.request import HTTPXRequest, RequestData
+
+
+# Outbound queue bound; when full, the least important queued message is dropped
+_QUEUE_SIZE = 256
+
+# Queue priorities (lower is sent first and dropped last)
+PRIORITY_CRITICAL = 0  # errors, startup, shutdown
+PRIORITY_TRADE = 1  # trade and close notifications
+PRIORITY_REPORT = 2  # hourly reports
+
+# Queued messages merged into one Telegram message per send
+_MAX_COALESCE = 10
+_COALESCE_SEPARATOR = "\n━━━\n"
+_MAX_MESSAGE_LENGTH = 4096
+
+# Longest stop() waits for queued messages to go out before dropping them
+_STOP_TIMEOUT = 10.0
+
+# Minimum spacing between sends (Telegram allows ~30 messages/second)
+_SEND_INTERVAL = 1 / 30
+
+
+# Message templates, built once at import time
+_TRADE_TMPL = """{mode_emoji} <b>New Trade Copied!</b> {mode_text}
+
+<b>Symbol:</b> {symbol}
+<b>Side:</b> {side}
+<b>Your Size:</b> {size:.4f}
+<b>Entry:</b> ${entry_price:,.2f}
+<b>Leverage:</b> {leverage}x
+<b>Notional:</b> ${notional:,.2f}
+
+━━━━━━━━━━━━━━━━━━
+<b>Target Size:</b> {target_size:.4f}
+<b>Time:</b> {time}"""
+
+_TRADE_DIGEST_HEADER = "📦 <b>New Trades Copied ({count})</b>"
+_TRADE_DIGEST_SEPARATOR = "\n\n"
+
+_PNL_LINE_TMPL = "\n<b>PnL:</b> {pnl_emoji} ${pnl:,.2f}"
+
+_CLOSE_TMPL = """{mode_emoji} <b>Position Closed</b> {mode_text}
+
+<b>Symbol:</b> {symbol}{pnl_text}
+<b>Time:</b> {time}"""
+
+_HOURLY_TMPL = """📊 <b>Hourly Copy Trading Report</b>
+
+<b>Target:</b> <code>{wallet_head}...{wallet_tail}</code>
+
+━━━━━━━━━━━━━━━━━━━━━━━━━
+📈 <b>Trades Copied:</b> {trades_copied}
+💰 <b>Account PnL:</b> {pnl_emoji} ${pnl_usd:,.2f} ({pnl_pct:+.2f}%)
+📍 <b>Open Positions:</b> {open_positions}
+📝 <b>Open Orders:</b> {open_orders}
+━━━━━━━━━━━━━━━━━━━━━━━━━
+
+🕐 <b>Report Time:</b> {time}"""
+
+_ERROR_TMPL = """⚠️ <b>Error Detected</b>
+
+<code>{error_message}</code>
+
+<b>Time:</b> {time}"""
+
+_STARTUP_TMPL = """🚀 <b>Copy Trading Bot Started</b>
+
+<b>Target Wallet:</b>
+<code>{target_wallet}</code>
+
+<b>Configuration:</b>
+• Sizing: {sizing_mode}
+• Ratio: {ratio}
+• Leverage: {leverage_adjustment}x of target
+• Status: <b>ACTIVE</b> 🟢
+
+Bot is now monitoring for trades!"""
+
+_SHUTDOWN_TEXT = """🛑 <b>Copy Trading Bot Stopped</b>
+
+Bot has been shut down gracefully.
+Status: <b>INACTIVE</b> 🔴"""
+
+TIME_FMT = "%H:%M:%S UTC"
+_REPORT_TIME_FMT = "%H:%M UTC"
+
+# Last formatted timestamp per format: fmt -> (epoch second, text)
+_ts_cache: Dict[str, Tuple[int, str]] = {}
+
+
+def utc_timestamp(fmt: str = TIME_FMT) -> str:
+    """Current UTC time formatted with fmt, reformatted at most once per second"""
+    now = int(time.time())
+    cached = _ts_cache.get(fmt)
+    if cached is not None and cached[0] == now:
+        return cached[1]
+    text = time.strftime(fmt, time.gmtime(now))
+    _ts_cache[fmt] = (now, text)
+    return text
+
+
+class _OrjsonRequestData:
+    """Request payload view whose JSON-encoded parameters come from orjson"""
+    
+    __slots__ = ("json_parameters", "multipart_data")
+    
+    def __init__(self, request_data: RequestData):
+        # Same encoding as RequestParameter.json_value: strings pass through
+        self.json_parameters = {
+            name: value if isinstance(value, str) else orjson.dumps(value).decode()
+            for name, value in request_data.parameters.items()
+        }
+        self.multipart_data = request_data.multipart_data
+
+
+@functools.lru_cache(maxsize=None)
+def _orjson_request_class() -> type:
+    """HTTPXRequest subclass that encodes parameters and decodes responses with orjson"""
+    from telegram.error import TelegramError
+    from telegram.request import HTTPXRequest
+    
+    class _OrjsonRequest(HTTPXRequest):
+        async def do_request(self, url: str, method: str, request_data: Optional[RequestData] = None, **kwargs):
+            if request_data is not None:
+                request_data = _OrjsonRequestData(request_data)
+            return await super().do_request(url, method, request_data, **kwargs)
+        
+        def parse_json_payload(self, payload: bytes) -> Any:
+            try:
+                return orjson.loads(payload)
+            except orjson.JSONDecodeError as exc:
+                raise TelegramError("Invalid server response") from exc
+    
+    return _OrjsonRequest
+
+
+def build_request() -> HTTPXRequest:
+    """HTTP transport for bot API calls, sized so bursts don't exhaust the pool"""
+    return _orjson_request_class()(
+        connection_pool_size=32,
+        connect_timeout=5,
+        read_timeout=10,
+        pool_timeout=5
+    )
+
+
+class _NotificationQueue(asyncio.PriorityQueue):
+    """PriorityQueue of (priority, seq, text, parse_mode) that can evict its least important entry"""
+    
+    def least_important(self) -> Tuple[int, int, str, str]:
+        """Oldest entry of the lowest priority currently queued"""
+        return max(self._queue, key=lambda item: (item[0], -item[1]))
+    
+    def evict(self, item: Tuple[int, int, str, str]):
+        """Remove a queued entry without sending it"""
+        self._queue.remove(item)
+        heapq.heapify(self._queue)
+        self.task_done()
+
 
 class NotificationService:
     """
     Service for sending Telegram notifications
     """
     
-    def __init__(self, bot_token: str, chat_id: str):
+    __slots__ = (
+        "bot",
+        "chat_id",
+        "enabled",
+        "trade_digest_window",
+        "_queue",
+        "_worker",
+        "_seq",
+        "_dropped",
+        "_trade_buf",
+        "_trade_flush_task"
+    )
+    
+    def __init__(
+        self,
+        bot_token: str,
+        chat_id: str,
+        bot: Optional[Bot] = None,
+        trade_digest_window: float = 0.5
+    ):
         """
         Initialize notification service
         
         Args:
             bot_token: Telegram bot token
             chat_id: Chat ID to send notifications to
+            bot: Existing bot to send through (e.g. TelegramBot.app.bot), so
+                commands and notifications share one HTTP connection pool
+            trade_digest_window: Seconds to collect trade notifications into
+                one digest message (0 sends each trade on its own)
         """
-        self.bot = Bot(token=bot_token)
+        if bot is None:
+            from telegram import Bot
+            bot = Bot(token=bot_token, request=build_request())
+        self.bot = bot
         self.chat_id = chat_id
         self.enabled = True
+        self.trade_digest_window = trade_digest_window
+        
+        # Rendered trade notifications waiting for the digest window to close
+        self._trade_buf: List[str] = []
+        self._trade_flush_task: Optional[asyncio.Task] = None
+        
+        # Messages are queued by priority and sent by a single background worker
+        self._queue = _NotificationQueue(maxsize=_QUEUE_SIZE)
+        self._worker: Optional[asyncio.Task] = None
+        self._seq = itertools.count()  # keeps FIFO order within a priority
+        self._dropped = 0
         
         logger.info(f"Notification service initialized for chat {chat_id}")
     
-    async def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
-        """Send a message to the configured chat"""
+    async def send_message(
+        self,
+        message: str,
+        parse_mode: str = "HTML",
+        priority: int = PRIORITY_TRADE
+    ) -> bool:
+        """Queue a message for the configured chat; returns once it is queued"""
         if not self.enabled:
             logger.debug("Notifications disabled, skipping message")
             return False
         
-        try:
-            await self.bot.send_message(
-                chat_id=self.chat_id,
-                text=message,
-                parse_mode=parse_mode
-            )
-            return True
-        except Exception as e:
-            logger.error(f"Failed to send Telegram message: {e}")
-            return False
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        
+        item = (priority, next(self._seq), message, parse_mode)
+        if self._queue.full():
+            # Drop the oldest least important message, or this one if it matters least
+            victim = self._queue.least_important()
+            self._dropped += 1
+            if victim[0] < priority:
+                logger.warning(f"Notification queue full, dropped new message "
+                               f"(queue_dropped_total={self._dropped})")
+                return False
+            self._queue.evict(victim)
+            logger.warning(f"Notification queue full, dropped oldest priority-{victim[0]} message "
+                           f"(queue_dropped_total={self._dropped})")
+        self._queue.put_nowait(item)
+        return True
+    
+    async def _drain(self):
+        """Send queued messages, merging ones that arrive together into one send"""
+        carry: Optional[Tuple[int, int, str, str]] = None
+        while True:
+            if carry is None:
+                carry = await self._queue.get()
+            _, _, text, parse_mode = carry
+            carry = None
+            count = 1
+            
+            # Merge queued siblings with the same parse mode while they fit
+            while count < _MAX_COALESCE and not self._queue.empty():
+                nxt = self._queue.get_nowait()
+                merged = text + _COALESCE_SEPARATOR + nxt[2]
+                if nxt[3] != parse_mode or len(merged) > _MAX_MESSAGE_LENGTH:
+                    carry = nxt
+                    break
+                text = merged
+                count += 1
+            
+            started = time.monotonic()
+            try:
+                await self.bot.send_message(
+                    chat_id=self.chat_id,
+                    text=text,
+                    parse_mode=parse_mode
+                )
+            except Exception as e:
+                logger.error(f"Failed to send Telegram message: {e}")
+            finally:
+                # The carried message is marked done when it is sent
+                for _ in range(count):
+                    self._queue.task_done()
+            
+            await asyncio.sleep(max(0.0, _SEND_INTERVAL - (time.monotonic() - started)))
+    
+    async def _flush_trades_after(self, delay: float):
+        """Send the trade digest once the window has passed"""
+        await asyncio.sleep(delay)
+        self._trade_flush_task = None
+        await self._send_trade_digest()
+    
+    async def _send_trade_digest(self):
+        """Send buffered trades: a single trade as is, several as one digest"""
+        trades, self._trade_buf = self._trade_buf, []
+        if len(trades) == 1:
+            await self.send_message(trades[0])
+            return
+        
+        # Split into as few messages as fit Telegram's length limit
+        parts = [_TRADE_DIGEST_HEADER.format(count=len(trades))]
+        length = len(parts[0])
+        for trade in trades:
+            if length + len(_TRADE_DIGEST_SEPARATOR) + len(trade) > _MAX_MESSAGE_LENGTH:
+                await self.send_message(_TRADE_DIGEST_SEPARATOR.join(parts))
+                parts, length = [], -len(_TRADE_DIGEST_SEPARATOR)
+            parts.append(trade)
+            length += len(_TRADE_DIGEST_SEPARATOR) + len(trade)
+        if parts:
+            await self.send_message(_TRADE_DIGEST_SEPARATOR.join(parts))
+    
+    async def stop(self, timeout: float = _STOP_TIMEOUT):
+        """Send any buffered and queued messages (waiting up to timeout), then stop the background worker"""
+        if self._trade_flush_task is not None:
+            self._trade_flush_task.cancel()
+            self._trade_flush_task = None
+            await self._send_trade_digest()
+        
+        if self._worker is None:
+            return
+        if not self._worker.done():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Notification queue not drained after {timeout}s, "
+                               f"dropping {self._queue.qsize()} queued message(s)")
+        self._worker.cancel()
+        self._worker = None
     
     async def send_trade_notification(
         self,
@@ -52,25 +348,28 @@ class NotificationService:
         is_simulated: bool = True
     ):
         """Send notification about a copied trade"""
+        message = _TRADE_TMPL.format(
+            mode_emoji="🧪" if is_simulated else "✅",
+            mode_text="[SIMULATED]" if is_simulated else "",
+            symbol=symbol,
+            side=side.upper(),
+            size=size,
+            entry_price=entry_price,
+            leverage=leverage,
+            notional=size * entry_price,
+            target_size=target_size,
+            time=utc_timestamp()
+        )
+        if self.trade_digest_window <= 0:
+            await self.send_message(message)
+            return
         
-        mode_emoji = "🧪" if is_simulated else "✅"
-        mode_text = "[SIMULATED]" if is_simulated else ""
-        
-        message = f"""
-{mode_emoji} <b>New Trade Copied!</b> {mode_text}
-
-<b>Symbol:</b> {symbol}
-<b>Side:</b> {side.upper()}
-<b>Your Size:</b> {size:.4f}
-<b>Entry:</b> ${entry_price:,.2f}
-<b>Leverage:</b> {leverage}x
-<b>Notional:</b> ${size * entry_price:,.2f}
-
-━━━━━━━━━━━━━━━━━━
-<b>Target Size:</b> {target_size:.4f}
-<b>Time:</b> {datetime.now().strftime('%H:%M:%S UTC')}
-"""
-        await self.send_message(message.strip())
+        # Trades within one window go out together as a digest
+        self._trade_buf.append(message)
+        if self._trade_flush_task is None:
+            self._trade_flush_task = asyncio.create_task(
+                self._flush_trades_after(self.trade_digest_window)
+            )
     
     async def send_position_close_notification(
         self,
@@ -79,22 +378,18 @@ class NotificationService:
         is_simulated: bool = True
     ):
         """Send notification about a closed position"""
-        
-        mode_emoji = "🧪" if is_simulated else "🔴"
-        mode_text = "[SIMULATED]" if is_simulated else ""
-        
         pnl_text = ""
         if pnl is not None:
-            pnl_emoji = "📈" if pnl > 0 else "📉"
-            pnl_text = f"\n<b>PnL:</b> {pnl_emoji} ${pnl:,.2f}"
+            pnl_text = _PNL_LINE_TMPL.format(pnl_emoji="📈" if pnl > 0 else "📉", pnl=pnl)
         
-        message = f"""
-{mode_emoji} <b>Position Closed</b> {mode_text}
-
-<b>Symbol:</b> {symbol}{pnl_text}
-<b>Time:</b> {datetime.now().strftime('%H:%M:%S UTC')}
-"""
-        await self.send_message(message.strip())
+        message = _CLOSE_TMPL.format(
+            mode_emoji="🧪" if is_simulated else "🔴",
+            mode_text="[SIMULATED]" if is_simulated else "",
+            symbol=symbol,
+            pnl_text=pnl_text,
+            time=utc_timestamp()
+        )
+        await self.send_message(message)
     
     async def send_hourly_report(
         self,
@@ -106,35 +401,23 @@ class NotificationService:
         target_wallet: str
     ):
         """Send hourly trading report"""
-        
-        pnl_emoji = "📈" if account_pnl_usd > 0 else "📉"
-        
-        message = f"""
-📊 <b>Hourly Copy Trading Report</b>
-
-<b>Target:</b> <code>{target_wallet[:10]}...{target_wallet[-6:]}</code>
-
-━━━━━━━━━━━━━━━━━━━━━━━━━
-📈 <b>Trades Copied:</b> {trades_copied}
-💰 <b>Account PnL:</b> {pnl_emoji} ${account_pnl_usd:,.2f} ({account_pnl_pct:+.2f}%)
-📍 <b>Open Positions:</b> {open_positions}
-📝 <b>Open Orders:</b> {open_orders}
-━━━━━━━━━━━━━━━━━━━━━━━━━
-
-🕐 <b>Report Time:</b> {datetime.now().strftime('%H:%M UTC')}
-"""
-        await self.send_message(message.strip())
+        message = _HOURLY_TMPL.format(
+            wallet_head=target_wallet[:10],
+            wallet_tail=target_wallet[-6:],
+            trades_copied=trades_copied,
+            pnl_emoji="📈" if account_pnl_usd > 0 else "📉",
+            pnl_usd=account_pnl_usd,
+            pnl_pct=account_pnl_pct,
+            open_positions=open_positions,
+            open_orders=open_orders,
+            time=utc_timestamp(_REPORT_TIME_FMT)
+        )
+        await self.send_message(message, priority=PRIORITY_REPORT)
     
     async def send_error_notification(self, error_message: str):
         """Send error notification"""
-        message = f"""
-⚠️ <b>Error Detected</b>
-
-<code>{error_message}</code>
-
-<b>Time:</b> {datetime.now().strftime('%H:%M:%S UTC')}
-"""
-        await self.send_message(message.strip())
+        message = _ERROR_TMPL.format(error_message=error_message, time=utc_timestamp())
+        await self.send_message(message, priority=PRIORITY_CRITICAL)
     
     async def send_startup_notification(
         self,
@@ -144,31 +427,17 @@ class NotificationService:
         leverage_adjustment: float
     ):
         """Send bot startup notification"""
-        message = f"""
-🚀 <b>Copy Trading Bot Started</b>
-
-<b>Target Wallet:</b>
-<code>{target_wallet}</code>
-
-<b>Configuration:</b>
-• Sizing: {sizing_mode.title()}
-• Ratio: {ratio}
-• Leverage: {leverage_adjustment}x of target
-• Status: <b>ACTIVE</b> 🟢
-
-Bot is now monitoring for trades!
-"""
-        await self.send_message(message.strip())
+        message = _STARTUP_TMPL.format(
+            target_wallet=target_wallet,
+            sizing_mode=sizing_mode.title(),
+            ratio=ratio,
+            leverage_adjustment=leverage_adjustment
+        )
+        await self.send_message(message, priority=PRIORITY_CRITICAL)
     
     async def send_shutdown_notification(self):
         """Send bot shutdown notification"""
-        message = """
-🛑 <b>Copy Trading Bot Stopped</b>
-
-Bot has been shut down gracefully.
-Status: <b>INACTIVE</b> 🔴
-"""
-        await self.send_message(message.strip())
+        await self.send_message(_SHUTDOWN_TEXT, priority=PRIORITY_CRITICAL)
     
     def enable(self):
         """Enable notifications"""